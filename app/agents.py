@@ -1,15 +1,96 @@
 from __future__ import annotations
 
-import json
+import asyncio
+import hashlib
+import heapq
+import math
 import re
 from abc import ABC, abstractmethod
 from collections.abc import AsyncGenerator
 from typing import Any, Literal
 
+import orjson
+
+from .cache import TTLCache
 from .llm_client import call_llm, call_llm_stream
 from .models import AgentMessage, DialogueState, LLMConfig, RetrievalResult, SearchDirective
 from .search_tool import TavilySearchTool
 
+_KEYWORD_RE = re.compile(r"[A-Za-z0-9\u4e00-\u9fff]{2,}")
+_JSON_FENCE_RE = re.compile(r"```(?:json)?\s*(\{.*?\})\s*```", re.DOTALL)
+# Generic terms that do not make a search query specific on their own.
+_ABSTRACT_TERMS = frozenset({"策略", "风险", "舆情", "传播", "问题", "事件", "影响", "机制", "分析", "方向"})
+# Streamed deltas are forwarded in bursts of at most this size / age.
+_TOKEN_FLUSH_CHARS = 64
+_TOKEN_FLUSH_SECONDS = 0.02
+
+# BM25 term-saturation and length-normalisation parameters for intel ranking.
+_BM25_K1 = 1.2
+_BM25_B = 0.75
+
+# Planner results keyed by the exact planner request, shared across sessions so
+# retries and re-runs of the same topic skip the planner LLM round-trip.
+_planner_cache: TTLCache[list[SearchDirective]] = TTLCache(maxsize=1024, ttl=3600)
+
+# Search-planner prompt; braces in the JSON example are doubled for str.format.
+_PLANNER_TMPL = (
+    "你是{role}检索规划器。\n"
+    "{header}"
+    "当前轮次: {turn_index}\n"
+    "对方最新观点/问题: {counterpart}\n"
+    "我方上一轮结论: {own_last}\n"
+    "共享情报池摘要:\n{intel_digest}\n\n"
+    "请按以下步骤构建检索词，再输出4条结果(JSON数组字符串)：\n"
+    "步骤1【提炼对象】：先从上下文中提炼具体对象词（人物/机构/平台/城市/政策名/话题标签）。\n"
+    "步骤2【锁定意图】：为每条词指定一个检索意图（事实核验/反例查找/传播链路/合规边界）。\n"
+    "步骤3【组合结构】：按\"对象词 + 时间或场景 + 冲突点/争议点 + 证据类型\"拼接。\n"
+    "步骤4【发散隐藏变量】：至少1条加入隐藏变量，如利益相关方、二阶影响、执行约束。\n"
+    "步骤5【去同质化】：4条词必须角度不同，不能只是同义改写。\n"
+    "步骤6【站点范围】：按需要为每条词附加1-3个站点域名（如 reddit.com, ptt.cc, weibo.com），没有必要可留空。\n"
+    "步骤7【时间范围】：为每条词指定 days 字段（过去N天，1-365之间的整数）：\n"
+    "  - 突发事件/实时舆情 → 7或14；\n"
+    "  - 近期动态/月度追踪 → 30；\n"
+    "  - 背景调研/季度复盘 → 90；\n"
+    "  - 历史判例/长周期分析 → 365；\n"
+    "  - 不限时间（全量检索）→ 省略 days 字段或设为 null。\n"
+    "输出要求：\n"
+    '- 每条都必须是对象：{{"query":"...","domains":["..."],"days":30}}；\n'
+    "- query必须是可直接搜索的完整短句；\n"
+    "- 避免抽象空词（如：策略、风险、舆情分析）；\n"
+    "- 尽量使用具体名词和可验证线索词（通报/判例/数据截图/时间线/原始信源）。"
+)
+
+# User-prompt templates, filled once per turn with str.format; {header} is
+# DialogueState.prompt_header.
+_ANALYSIS_USER_TMPL = (
+    "{header}"
+    "当前轮次: {turn_index}\n"
+    "Agent B 上一轮内容（请先回答其中的问题）:\n{prior_questions}\n"
+    "本轮检索词（具体关键词）:\n- {directives}\n"
+    "本轮新增检索情报数: {new_intel_count}\n"
+    "当前相关证据（从共享池按相关性筛选）:\n{retrieval_digest}\n"
+    "引用目录（回答中请使用 [R1]/[R2] 标注证据来源）:\n{citation_catalog}\n"
+    "请在回答中明确：你使用了哪些证据、哪些仍需验证。"
+)
+
+_CHALLENGE_USER_TMPL = (
+    "{header}"
+    "分析者最新输出:\n{a_reference}\n"
+    "本轮检索词（具体关键词）:\n- {directives}\n"
+    "本轮新增检索情报数: {new_intel_count}\n"
+    "当前相关证据（从共享池按相关性筛选）:\n{retrieval_digest}\n"
+    "引用目录（回答中请使用 [R1]/[R2] 标注证据来源）:\n{citation_catalog}\n"
+    "请基于证据提出关键批评、明确问题（至少1个）和测试建议。"
+)
+
+_OBSERVER_USER_TMPL = (
+    "{header}"
+    "A/B讨论记录（按时间顺序）:\n{dialogue}\n"
+    "共享情报池摘要:\n{intel_digest}\n"
+    "引用目录（回答中请使用 [R1]/[R2] 标注证据来源）:\n{citation_catalog}\n"
+    "请输出最终策略报告，要求可直接给PR团队执行。"
+)
+
 
 class BaseAgent(ABC):
     def __init__(
@@ -31,6 +112,11 @@ class BaseAgent(ABC):
         self.search_tool = search_tool
         self.search_topk = search_topk
         self.default_search_domains = [d.strip() for d in (default_search_domains or []) if d.strip()]
+        self._last_plan: tuple[set[str], list[SearchDirective]] | None = None
+        self._topic_keywords: tuple[str, list[str]] | None = None
+        self._topic_search: asyncio.Task[list[RetrievalResult]] | None = None
+        # Identical on every turn, so assembled once.
+        self._system_prompt = f"{system_prompt}\n\n能力偏好：\n{capability_prompt or '无'}"
 
     @abstractmethod
     async def generate(self, state: DialogueState) -> AsyncGenerator[dict, None]:
@@ -57,35 +143,143 @@ class BaseAgent(ABC):
             days=days,
         )
 
-    async def call_llm(self, messages: list[dict[str, str]]) -> str:
+    async def run_searches(self, directives: list[SearchDirective]) -> list[RetrievalResult]:
+        """Execute all directives concurrently and merge their results in directive order."""
+        return await self.search_tool.search_many(
+            directives, topk=self.search_topk, default_domains=self.default_search_domains
+        )
+
+    def _start_topic_search(self, state: DialogueState) -> None:
+        """Start the session's one-off bare-topic search so it overlaps with a planner LLM call."""
+        if state.add_queries([state.topic]):
+            self._topic_search = asyncio.create_task(self.maybe_call_search(query=state.topic))
+
+    async def _collect_topic_search(self) -> list[RetrievalResult]:
+        topic_search, self._topic_search = self._topic_search, None
+        return await topic_search if topic_search is not None else []
+
+    async def call_llm(self, messages: list[dict[str, str]], config: LLMConfig | None = None) -> str:
         """Non-streaming call – used only for internal planning steps."""
-        return await call_llm(messages=messages, config=self.llm_config)
+        return await call_llm(messages=messages, config=config or self.llm_config)
 
     async def stream_llm(self, messages: list[dict[str, str]]) -> AsyncGenerator[str, None]:
-        """Streaming call – yields tokens for the main response."""
-        async for token in call_llm_stream(messages=messages, config=self.llm_config):
-            yield token
+        """Streaming call – yields the main response in small bursts of tokens.
+
+        Deltas are coalesced until `_TOKEN_FLUSH_CHARS` characters or `_TOKEN_FLUSH_SECONDS`
+        have accumulated, so fast providers do not cost one event per token downstream.
+        The first delta is always sent immediately, and a timer flushes buffered text
+        even when the provider pauses between deltas.
+        """
+        # The provider stream is read by its own task, so waiting on the flush timer
+        # never interrupts an in-progress read.
+        deltas: asyncio.Queue[str | None] = asyncio.Queue()
+
+        async def pump() -> None:
+            try:
+                async for token in call_llm_stream(messages=messages, config=self.llm_config):
+                    deltas.put_nowait(token)
+            finally:
+                deltas.put_nowait(None)
+
+        pump_task = asyncio.create_task(pump())
+        loop = asyncio.get_running_loop()
+        buffer: list[str] = []
+        buffered = 0
+        last_flush = float("-inf")
+        try:
+            while True:
+                timeout = max(last_flush + _TOKEN_FLUSH_SECONDS - loop.time(), 0) if buffer else None
+                try:
+                    token = await asyncio.wait_for(deltas.get(), timeout)
+                except asyncio.TimeoutError:
+                    token = ""  # flush timer fired with text still buffered
+                if token is None:
+                    break
+                buffer.append(token)
+                buffered += len(token)
+                now = loop.time()
+                if not token or buffered >= _TOKEN_FLUSH_CHARS or now - last_flush >= _TOKEN_FLUSH_SECONDS:
+                    yield "".join(buffer)
+                    buffer.clear()
+                    buffered = 0
+                    last_flush = now
+            if buffer:
+                yield "".join(buffer)
+            await pump_task  # surfaces a failure of the fallback call
+        finally:
+            pump_task.cancel()
 
     # ------------------------------------------------------------------ #
-    # Utilities (unchanged from original)                                  #
+    # Utilities                                                          #
     # ------------------------------------------------------------------ #
     def _try_extract_json(self, text: str) -> dict[str, Any]:
         text = text.strip()
-        if not text:
-            return {}
-        try:
-            return json.loads(text)
-        except json.JSONDecodeError:
+        # Prose is the default reply format; without a brace there is nothing to extract.
+        if "{" not in text:
             return {}
+        if text.startswith("{"):
+            try:
+                return orjson.loads(text)
+            except orjson.JSONDecodeError:
+                pass
+        # Models usually wrap the object in a ```json fence; take that before scanning braces.
+        fenced = _JSON_FENCE_RE.search(text)
+        if fenced is not None:
+            try:
+                parsed = orjson.loads(fenced.group(1))
+            except orjson.JSONDecodeError:
+                parsed = None
+            if isinstance(parsed, dict):
+                return parsed
+        # The object may be wrapped in prose: try each top-level balanced {...} block in turn.
+        # Never descend into a block, or a truncated reply would yield one of its nested objects.
+        start = text.find("{")
+        while start != -1:
+            end = self._find_object_end(text, start)
+            if end == -1:
+                break  # unbalanced: every later brace is inside this block
+            try:
+                parsed = orjson.loads(text[start:end])
+            except orjson.JSONDecodeError:
+                parsed = None
+            if isinstance(parsed, dict):
+                return parsed
+            start = text.find("{", end)
+        return {}
+
+    def _find_object_end(self, text: str, start: int) -> int:
+        """Index just past the brace closing the one at `start`, or -1; braces inside strings are ignored."""
+        depth = 0
+        in_string = False
+        escaped = False
+        for idx in range(start, len(text)):
+            ch = text[idx]
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif ch == "\\":
+                    escaped = True
+                elif ch == '"':
+                    in_string = False
+            elif ch == '"':
+                in_string = True
+            elif ch == "{":
+                depth += 1
+            elif ch == "}":
+                depth -= 1
+                if depth == 0:
+                    return idx + 1
+        return -1
 
     def _build_system_prompt(self) -> str:
-        return f"{self.system_prompt}\n\n能力偏好：\n{self.capability_prompt or '无'}"
+        return self._system_prompt
 
     def _extract_keywords(self, text: str, maxn: int = 10) -> list[str]:
-        tokens = re.findall(r"[A-Za-z0-9\u4e00-\u9fff]{2,}", text)
         seen: set[str] = set()
         keywords: list[str] = []
-        for token in tokens:
+        # finditer so a long message stops being scanned once maxn keywords are found.
+        for match in _KEYWORD_RE.finditer(text):
+            token = match.group()
             low = token.lower()
             if low in seen:
                 continue
@@ -101,21 +295,79 @@ class BaseAgent(ABC):
     def _intel_digest(self, state: DialogueState, topn: int = 6) -> str:
         if not state.intel_pool:
             return "无"
-        items = state.intel_pool[-topn:]
-        return "\n".join([f"- {r.title} ({r.url}): {r.content[:160]}" for r in items])
+        items = state.recent_intel(topn)
+        return "\n".join([f"- {r.title} ({r.url}): {r.snippet_short}" for r in items])
+
+    def _focus_keywords(self, topic: str, focus_text: str, maxn: int = 10) -> list[str]:
+        """Lower-cased keywords of `topic` followed by new ones from `focus_text`, up to `maxn`."""
+        # The topic is fixed for a session, so its keywords are extracted once per agent.
+        if self._topic_keywords is None or self._topic_keywords[0] != topic:
+            self._topic_keywords = (topic, [kw.lower() for kw in self._extract_keywords(topic, maxn)])
+        keywords = list(self._topic_keywords[1])
+        seen = set(keywords)
+        for kw in self._extract_keywords(focus_text, maxn * 2):
+            if len(keywords) >= maxn:
+                break
+            low = kw.lower()
+            if low not in seen:
+                seen.add(low)
+                keywords.append(low)
+        return keywords
 
     def _select_intel_for_prompt(self, state: DialogueState, focus_text: str, topn: int = 5) -> list[RetrievalResult]:
         if not state.intel_pool:
             return []
-        focus_keywords = self._extract_keywords(f"{state.topic} {focus_text}")
+        focus_keywords = self._focus_keywords(state.topic, focus_text)
+        pool = state.intel_pool
+        avg_len = sum(len(r.match_text) for r in pool) / len(pool) or 1.0
+        # BM25 over substring matches: CJK runs are not word-segmented, so a
+        # keyword counts wherever it occurs in the text, not only as a whole token.
+        idf: dict[str, float] = {}
+        for kw in focus_keywords:
+            df = sum(1 for r in pool if kw in r.match_text)
+            if df:
+                idf[kw] = math.log(1 + (len(pool) - df + 0.5) / (df + 0.5))
 
         def score(item: RetrievalResult) -> float:
-            hay = f"{item.title} {item.content}".lower()
-            overlap = sum(1 for kw in focus_keywords if kw.lower() in hay)
-            return overlap * 10 + item.score
+            hay = item.match_text
+            norm = _BM25_K1 * (1 - _BM25_B + _BM25_B * len(hay) / avg_len)
+            relevance = 0.0
+            for kw, weight in idf.items():
+                tf = hay.count(kw)
+                if tf:
+                    relevance += weight * tf * (_BM25_K1 + 1) / (tf + norm)
+            return relevance * 10 + item.score
+
+        return heapq.nlargest(topn, state.intel_pool, key=score)
+
+    def _dedupe_results(self, results: list[RetrievalResult], threshold: float = 0.8) -> list[RetrievalResult]:
+        """Drop repeated URLs and near-duplicate snippets (character-trigram Jaccard above `threshold`).
 
-        ranked = sorted(state.intel_pool, key=score, reverse=True)
-        return ranked[:topn]
+        For a repeated URL the highest-scoring hit is kept, at the position the URL first appeared.
+        """
+        best_by_url: dict[str | int, RetrievalResult] = {}
+        for item in results:
+            url_key: str | int = item.url.strip().rstrip("/") or id(item)
+            prev = best_by_url.get(url_key)
+            if prev is None or item.score > prev.score:
+                best_by_url[url_key] = item
+
+        kept: list[RetrievalResult] = []
+        kept_shingles: list[set[str]] = []
+        for item in best_by_url.values():
+            text = self._normalize_query(f"{item.title} {item.content[:400]}")
+            shingles = {text[i : i + 3] for i in range(max(len(text) - 2, 1))}
+            if any(len(shingles & other) > threshold * len(shingles | other) for other in kept_shingles):
+                continue
+            kept.append(item)
+            kept_shingles.append(shingles)
+        return kept
+
+    def _format_directives(self, directives: list[SearchDirective]) -> str:
+        return "\n- ".join([f"{d.query} | sites={','.join(d.domains) if d.domains else 'all'}" for d in directives])
+
+    def _format_evidence(self, items: list[RetrievalResult]) -> str:
+        return "\n".join([f"- {r.title} ({r.url}): {r.snippet_med}" for r in items])
 
     def _format_citation_catalog(self, sources: list[RetrievalResult]) -> str:
         if not sources:
@@ -123,7 +375,6 @@ class BaseAgent(ABC):
         return "\n".join([f"[R{idx}] {src.title} | {src.url}" for idx, src in enumerate(sources, start=1)])
 
     def _keep_specific_directives(self, directives: list[SearchDirective], max_count: int = 4) -> list[SearchDirective]:
-        abstract = {"策略", "风险", "舆情", "传播", "问题", "事件", "影响", "机制", "分析", "方向"}
         kept: list[SearchDirective] = []
         seen: set[str] = set()
         for directive in directives:
@@ -133,9 +384,7 @@ class BaseAgent(ABC):
             norm = self._normalize_query(q)
             if norm in seen:
                 continue
-            tokens = self._extract_keywords(q, maxn=16)
-            specific_tokens = [t for t in tokens if t not in abstract]
-            if len(specific_tokens) < 2:
+            if len(set(self._extract_keywords(q, maxn=16)) - _ABSTRACT_TERMS) < 2:
                 continue
             seen.add(norm)
             domains = [d.strip() for d in (directive.domains or []) if d.strip()]
@@ -149,45 +398,123 @@ class BaseAgent(ABC):
         state: DialogueState,
         counterpart_message: str,
         own_last_message: str,
+    ) -> tuple[list[SearchDirective], bool]:
+        """Return this turn's directives and whether they were already searched on an earlier turn."""
+        # With nothing to respond to yet (A's opening turn), or an empty pool and a
+        # bare topic, the planner has almost no signal; the seeded fallback does as
+        # well without the LLM round-trip.
+        no_context = counterpart_message.strip() in {"", "无"} and not own_last_message.strip()
+        if no_context or (not state.intel_pool and len(self._extract_keywords(state.topic)) < 3):
+            directives = self._fallback_directives(state, counterpart_message, own_last_message)
+        else:
+            directives, reused = await self._planned_or_fallback(state, counterpart_message, own_last_message)
+            if reused:
+                # A reused plan's queries went through add_queries last time and their results
+                # are pooled; rewriting them would only buy fresh, uncached searches.
+                return directives, True
+
+        deduped_queries = state.add_queries([d.query for d in directives])
+        if deduped_queries:
+            deduped_set = set(deduped_queries)
+            return [d for d in directives if d.query in deduped_set][:4], False
+
+        return [
+            SearchDirective(query=f"{d.query} round{state.turn_index}", domains=d.domains)
+            for d in directives[:4]
+        ], False
+
+    async def _planned_or_fallback(
+        self,
+        state: DialogueState,
+        counterpart_message: str,
+        own_last_message: str,
+    ) -> tuple[list[SearchDirective], bool]:
+        """Planner directives, or the fallback; the flag is set when the previous plan was reused."""
+        # Warm start: while the counterpart's message is essentially unchanged since the
+        # last plan, reuse that plan instead of paying for another planner LLM call.
+        counterpart_terms = {k.lower() for k in self._extract_keywords(counterpart_message[:500], maxn=64)}
+        last_plan = self._last_plan
+        if (
+            last_plan is not None
+            and counterpart_terms
+            and len(counterpart_terms & last_plan[0]) >= 0.9 * len(counterpart_terms | last_plan[0])
+        ):
+            planned, reused = last_plan[1], True
+        else:
+            self._start_topic_search(state)
+            planned = await self._request_planned_directives(state, counterpart_message, own_last_message)
+            reused = False
+            if planned:
+                self._last_plan = (counterpart_terms, planned)
+
+        directives = self._keep_specific_directives(planned, max_count=4)
+        if directives:
+            return directives, reused
+        return self._fallback_directives(state, counterpart_message, own_last_message), False
+
+    def _fallback_directives(
+        self,
+        state: DialogueState,
+        counterpart_message: str,
+        own_last_message: str,
+    ) -> list[SearchDirective]:
+        seed_terms = self._extract_keywords(
+            f"{state.topic} {state.time_context} {state.pr_goal} {counterpart_message} {own_last_message}",
+            maxn=6,
+        )
+        seed_a = seed_terms[0] if len(seed_terms) > 0 else "涉事机构"
+        seed_b = seed_terms[1] if len(seed_terms) > 1 else "核心平台"
+        fallback_domains = self.default_search_domains[:2]
+        directives = [
+            SearchDirective(query=f"{state.topic} {seed_a} 时间线 关键节点 原始信源", domains=fallback_domains),
+            SearchDirective(query=f"{state.topic} {seed_b} 话题标签 扩散路径 数据截图", domains=fallback_domains),
+            SearchDirective(query=f"{state.topic} {state.pr_goal} 监管口径 政策条款 公开通报", domains=[]),
+            SearchDirective(query=f"{state.topic} {seed_a} 隐性关联方 二阶影响 反向案例", domains=[]),
+        ]
+        return self._keep_specific_directives(directives, max_count=4)
+
+    async def _request_planned_directives(
+        self,
+        state: DialogueState,
+        counterpart_message: str,
+        own_last_message: str,
     ) -> list[SearchDirective]:
-        planner_prompt = (
-            f"你是{self.role}检索规划器。\n"
-            f"话题: {state.topic}\n"
-            f"时间背景: {state.time_context or '未提供'}\n"
-            f"PR目标: {state.pr_goal or '未提供'}\n"
-            f"当前轮次: {state.turn_index}\n"
-            f"对方最新观点/问题: {counterpart_message[:600] if counterpart_message else '无'}\n"
-            f"我方上一轮结论: {own_last_message[:600] if own_last_message else '无'}\n"
-            f"共享情报池摘要:\n{self._intel_digest(state)}\n\n"
-            "请按以下步骤构建检索词，再输出4条结果(JSON数组字符串)：\n"
-            "步骤1【提炼对象】：先从上下文中提炼具体对象词（人物/机构/平台/城市/政策名/话题标签）。\n"
-            "步骤2【锁定意图】：为每条词指定一个检索意图（事实核验/反例查找/传播链路/合规边界）。\n"
-            "步骤3【组合结构】：按\"对象词 + 时间或场景 + 冲突点/争议点 + 证据类型\"拼接。\n"
-            "步骤4【发散隐藏变量】：至少1条加入隐藏变量，如利益相关方、二阶影响、执行约束。\n"
-            "步骤5【去同质化】：4条词必须角度不同，不能只是同义改写。\n"
-            "步骤6【站点范围】：按需要为每条词附加1-3个站点域名（如 reddit.com, ptt.cc, weibo.com），没有必要可留空。\n"
-            "步骤7【时间范围】：为每条词指定 days 字段（过去N天，1-365之间的整数）：\n"
-            "  - 突发事件/实时舆情 → 7或14；\n"
-            "  - 近期动态/月度追踪 → 30；\n"
-            "  - 背景调研/季度复盘 → 90；\n"
-            "  - 历史判例/长周期分析 → 365；\n"
-            "  - 不限时间（全量检索）→ 省略 days 字段或设为 null。\n"
-            "输出要求：\n"
-            '- 每条都必须是对象：{"query":"...","domains":["..."],"days":30}；\n'
-            "- query必须是可直接搜索的完整短句；\n"
-            "- 避免抽象空词（如：策略、风险、舆情分析）；\n"
-            "- 尽量使用具体名词和可验证线索词（通报/判例/数据截图/时间线/原始信源）。"
+        """Ask the LLM planner for directives; returns [] if the call or the parse fails."""
+        planner_prompt = _PLANNER_TMPL.format(
+            role=self.role,
+            header=state.prompt_header,
+            turn_index=state.turn_index,
+            counterpart=counterpart_message[:600] if counterpart_message else "无",
+            own_last=own_last_message[:600] if own_last_message else "无",
+            intel_digest=self._intel_digest(state),
         )
 
+        messages = [
+            {"role": "system", "content": "你只输出 JSON 数组，不要解释。"},
+            {"role": "user", "content": planner_prompt},
+        ]
+        planner_config = self.llm_config.planner_config
+        if planner_config is not None:
+            planned = await self._call_planner(messages, planner_config)
+            # Escalate to the main model only when the fast planner's output is unusable.
+            if self._keep_specific_directives(planned):
+                return planned
+        return await self._call_planner(messages, self.llm_config)
+
+    async def _call_planner(self, messages: list[dict[str, str]], config: LLMConfig) -> list[SearchDirective]:
+        cache_key = hashlib.blake2b(
+            orjson.dumps([config.base_url, config.model_name, messages]), digest_size=16
+        ).hexdigest()
+        cached = _planner_cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
+
         planned: list[SearchDirective] = []
         try:
-            raw = await self.call_llm(
-                [
-                    {"role": "system", "content": "你只输出 JSON 数组，不要解释。"},
-                    {"role": "user", "content": planner_prompt},
-                ]
-            )
-            parsed = json.loads(raw)
+            raw = await self.call_llm(messages, config=config)
+            # Models often wrap the array in prose or a code fence; parse just the array.
+            start, end = raw.find("["), raw.rfind("]")
+            parsed = orjson.loads(raw[start : end + 1] if 0 <= start < end else raw)
             if isinstance(parsed, list):
                 for item in parsed:
                     if isinstance(item, str):
@@ -213,33 +540,9 @@ class BaseAgent(ABC):
                         )
         except Exception:
             pass
-
-        directives = self._keep_specific_directives(planned, max_count=4)
-        if not directives:
-            seed_terms = self._extract_keywords(
-                f"{state.topic} {state.time_context} {state.pr_goal} {counterpart_message} {own_last_message}",
-                maxn=6,
-            )
-            seed_a = seed_terms[0] if len(seed_terms) > 0 else "涉事机构"
-            seed_b = seed_terms[1] if len(seed_terms) > 1 else "核心平台"
-            fallback_domains = self.default_search_domains[:2]
-            directives = [
-                SearchDirective(query=f"{state.topic} {seed_a} 时间线 关键节点 原始信源", domains=fallback_domains),
-                SearchDirective(query=f"{state.topic} {seed_b} 话题标签 扩散路径 数据截图", domains=fallback_domains),
-                SearchDirective(query=f"{state.topic} {state.pr_goal} 监管口径 政策条款 公开通报", domains=[]),
-                SearchDirective(query=f"{state.topic} {seed_a} 隐性关联方 二阶影响 反向案例", domains=[]),
-            ]
-            directives = self._keep_specific_directives(directives, max_count=4)
-
-        deduped_queries = state.add_queries([d.query for d in directives])
-        if deduped_queries:
-            deduped_set = set(deduped_queries)
-            return [d for d in directives if d.query in deduped_set][:4]
-
-        return [
-            SearchDirective(query=f"{d.query} round{state.turn_index}", domains=d.domains)
-            for d in directives[:4]
-        ]
+        if planned:
+            _planner_cache.set(cache_key, planned)
+        return list(planned)
 
 
 # --------------------------------------------------------------------------- #
@@ -247,13 +550,13 @@ class BaseAgent(ABC):
 # --------------------------------------------------------------------------- #
 class AnalysisAgent(BaseAgent):
     async def generate(self, state: DialogueState) -> AsyncGenerator[dict, None]:  # type: ignore[override]
-        prior_critic = next((m for m in reversed(state.messages) if m.get("role") == "B"), None)
+        prior_critic = state.last_by_role.get("B")
         prior_questions = prior_critic.get("content", "") if prior_critic else "无"
-        own_last = next((m for m in reversed(state.messages) if m.get("role") == "A"), None)
+        own_last = state.last_by_role.get("A")
         own_last_content = own_last.get("content", "") if own_last else ""
 
         # ── Phase 1: plan searches ─────────────────────────────────────────
-        search_directives = await self._plan_search_queries(
+        search_directives, already_searched = await self._plan_search_queries(
             state=state,
             counterpart_message=prior_questions,
             own_last_message=own_last_content,
@@ -264,29 +567,21 @@ class AnalysisAgent(BaseAgent):
         }
 
         # ── Phase 2: execute searches ──────────────────────────────────────
-        merged_results: list[RetrievalResult] = []
-        for directive in search_directives:
-            merged_results.extend(await self.maybe_call_search(query=directive.query, domains=directive.domains, days=directive.days))
-        new_intel = state.add_intel(merged_results)
+        merged_results = [] if already_searched else await self.run_searches(search_directives)
+        merged_results.extend(await self._collect_topic_search())
+        new_intel = state.add_intel(self._dedupe_results(merged_results))
         focus_intel = self._select_intel_for_prompt(state, prior_questions)
-        retrieval_digest = "\n".join([f"- {r.title} ({r.url}): {r.content[:200]}" for r in focus_intel])
+        retrieval_digest = self._format_evidence(focus_intel)
 
         # ── Phase 3: stream main response ─────────────────────────────────
-        user_prompt = (
-            f"话题: {state.topic}\n"
-            f"时间背景: {state.time_context or '未提供'}\n"
-            f"PR目标: {state.pr_goal or '未提供'}\n"
-            f"当前轮次: {state.turn_index}\n"
-            f"Agent B 上一轮内容（请先回答其中的问题）:\n{prior_questions}\n"
-            f"本轮检索词（具体关键词）:\n- "
-            + "\n- ".join(
-                [f"{d.query} | sites={','.join(d.domains) if d.domains else 'all'}" for d in search_directives]
-            )
-            + "\n"
-            f"本轮新增检索情报数: {len(new_intel)}\n"
-            f"当前相关证据（从共享池按相关性筛选）:\n{retrieval_digest or '无'}\n"
-            f"引用目录（回答中请使用 [R1]/[R2] 标注证据来源）:\n{self._format_citation_catalog(focus_intel)}\n"
-            "请在回答中明确：你使用了哪些证据、哪些仍需验证。"
+        user_prompt = _ANALYSIS_USER_TMPL.format(
+            header=state.prompt_header,
+            turn_index=state.turn_index,
+            prior_questions=prior_questions,
+            directives=self._format_directives(search_directives),
+            new_intel_count=len(new_intel),
+            retrieval_digest=retrieval_digest or "无",
+            citation_catalog=self._format_citation_catalog(focus_intel),
         )
         messages = [
             {"role": "system", "content": self._build_system_prompt()},
@@ -295,10 +590,11 @@ class AnalysisAgent(BaseAgent):
 
         yield {"event": "generate_start"}
 
-        full_content = ""
+        parts: list[str] = []
         async for token in self.stream_llm(messages):
-            full_content += token
+            parts.append(token)
             yield {"event": "token", "content": token}
+        full_content = "".join(parts)
 
         # ── Phase 4: emit complete message ────────────────────────────────
         yield {
@@ -320,13 +616,13 @@ class AnalysisAgent(BaseAgent):
 # --------------------------------------------------------------------------- #
 class ChallengeAgent(BaseAgent):
     async def generate(self, state: DialogueState) -> AsyncGenerator[dict, None]:  # type: ignore[override]
-        last_a = next((m for m in reversed(state.messages) if m.get("role") == "A"), None)
+        last_a = state.last_by_role.get("A")
         a_reference = last_a.get("content", "") if last_a else ""
-        own_last = next((m for m in reversed(state.messages) if m.get("role") == "B"), None)
+        own_last = state.last_by_role.get("B")
         own_last_content = own_last.get("content", "") if own_last else ""
 
         # ── Phase 1: plan searches ─────────────────────────────────────────
-        search_directives = await self._plan_search_queries(
+        search_directives, already_searched = await self._plan_search_queries(
             state=state,
             counterpart_message=a_reference,
             own_last_message=own_last_content,
@@ -337,28 +633,20 @@ class ChallengeAgent(BaseAgent):
         }
 
         # ── Phase 2: execute searches ──────────────────────────────────────
-        merged_results: list[RetrievalResult] = []
-        for directive in search_directives:
-            merged_results.extend(await self.maybe_call_search(query=directive.query, domains=directive.domains, days=directive.days))
-        new_intel = state.add_intel(merged_results)
+        merged_results = [] if already_searched else await self.run_searches(search_directives)
+        merged_results.extend(await self._collect_topic_search())
+        new_intel = state.add_intel(self._dedupe_results(merged_results))
         focus_intel = self._select_intel_for_prompt(state, a_reference)
-        retrieval_digest = "\n".join([f"- {r.title} ({r.url}): {r.content[:200]}" for r in focus_intel])
+        retrieval_digest = self._format_evidence(focus_intel)
 
         # ── Phase 3: stream main response ─────────────────────────────────
-        user_prompt = (
-            f"话题: {state.topic}\n"
-            f"时间背景: {state.time_context or '未提供'}\n"
-            f"PR目标: {state.pr_goal or '未提供'}\n"
-            f"分析者最新输出:\n{a_reference}\n"
-            f"本轮检索词（具体关键词）:\n- "
-            + "\n- ".join(
-                [f"{d.query} | sites={','.join(d.domains) if d.domains else 'all'}" for d in search_directives]
-            )
-            + "\n"
-            f"本轮新增检索情报数: {len(new_intel)}\n"
-            f"当前相关证据（从共享池按相关性筛选）:\n{retrieval_digest or '无'}\n"
-            f"引用目录（回答中请使用 [R1]/[R2] 标注证据来源）:\n{self._format_citation_catalog(focus_intel)}\n"
-            "请基于证据提出关键批评、明确问题（至少1个）和测试建议。"
+        user_prompt = _CHALLENGE_USER_TMPL.format(
+            header=state.prompt_header,
+            a_reference=a_reference,
+            directives=self._format_directives(search_directives),
+            new_intel_count=len(new_intel),
+            retrieval_digest=retrieval_digest or "无",
+            citation_catalog=self._format_citation_catalog(focus_intel),
         )
         messages = [
             {"role": "system", "content": self._build_system_prompt()},
@@ -367,10 +655,11 @@ class ChallengeAgent(BaseAgent):
 
         yield {"event": "generate_start"}
 
-        full_content = ""
+        parts: list[str] = []
         async for token in self.stream_llm(messages):
-            full_content += token
+            parts.append(token)
             yield {"event": "token", "content": token}
+        full_content = "".join(parts)
 
         yield {
             "event": "done",
@@ -391,26 +680,28 @@ class ChallengeAgent(BaseAgent):
 # --------------------------------------------------------------------------- #
 class ObserverAgent(BaseAgent):
     async def generate(self, state: DialogueState) -> AsyncGenerator[dict, None]:  # type: ignore[override]
+        # Only the last 16 A/B turns go into the prompt; walk back from the end so
+        # long debates are not scanned and formatted in full.
         dialogue_lines: list[str] = []
-        for m in state.messages:
+        for m in reversed(state.messages):
             role = m.get("role", "")
             if role not in {"A", "B"}:
                 continue
             content = str(m.get("content", "")).strip()
             if content:
                 dialogue_lines.append(f"{role}: {content[:900]}")
-
-        focus_intel = state.intel_pool[-8:]
-        intel_digest = "\n".join([f"- {r.title} ({r.url}): {r.content[:180]}" for r in focus_intel]) or "无"
-
-        user_prompt = (
-            f"话题: {state.topic}\n"
-            f"时间背景: {state.time_context or '未提供'}\n"
-            f"PR目标: {state.pr_goal or '未提供'}\n"
-            f"A/B讨论记录（按时间顺序）:\n" + "\n".join(dialogue_lines[-16:]) + "\n"
-            f"共享情报池摘要:\n{intel_digest}\n"
-            f"引用目录（回答中请使用 [R1]/[R2] 标注证据来源）:\n{self._format_citation_catalog(focus_intel)}\n"
-            "请输出最终策略报告，要求可直接给PR团队执行。"
+                if len(dialogue_lines) == 16:
+                    break
+        dialogue_lines.reverse()
+
+        focus_intel = state.recent_intel(8)
+        intel_digest = self._format_evidence(focus_intel) or "无"
+
+        user_prompt = _OBSERVER_USER_TMPL.format(
+            header=state.prompt_header,
+            dialogue="\n".join(dialogue_lines),
+            intel_digest=intel_digest,
+            citation_catalog=self._format_citation_catalog(focus_intel),
         )
         messages = [
             {"role": "system", "content": self._build_system_prompt()},
@@ -419,10 +710,11 @@ class ObserverAgent(BaseAgent):
 
         yield {"event": "generate_start"}
 
-        full_content = ""
+        parts: list[str] = []
         async for token in self.stream_llm(messages):
-            full_content += token
+            parts.append(token)
             yield {"event": "token", "content": token}
+        full_content = "".join(parts)
 
         yield {
             "event": "done",
@@ -34,7 +34,7 @@ class DialogueEngine:
             pr_goal=pr_goal,
             max_rounds=max_rounds,
         )
-        state.messages.append(
+        state.add_message(
             UserMessage(
                 content=topic,
                 structured={"time_context": time_context, "pr_goal": pr_goal},
@@ -73,7 +73,6 @@ class DialogueEngine:
         }
 
         # ── Debate rounds ──────────────────────────────────────────────────
-        b_msg = None
         for round_idx in range(state.max_rounds):
             state.turn_index = round_idx
 
@@ -84,82 +83,13 @@ class DialogueEngine:
                 "max_rounds": state.max_rounds,
             }
 
-            # ---- Agent A ------------------------------------------------
-            a_msg = None
-            async for evt in self.analysis_agent.generate(state):
-                if evt["event"] == "search_start":
-                    yield {
-                        "type": "phase",
-                        "session_id": sid,
-                        "agent": "A",
-                        "phase": "searching",
-                        "round": round_idx + 1,
-                        "directives": evt.get("directives", []),
-                    }
-                elif evt["event"] == "generate_start":
-                    yield {
-                        "type": "phase",
-                        "session_id": sid,
-                        "agent": "A",
-                        "phase": "generating",
-                        "round": round_idx + 1,
-                    }
-                elif evt["event"] == "token":
-                    yield {
-                        "type": "token",
-                        "session_id": sid,
-                        "agent": "A",
-                        "content": evt["content"],
-                    }
-                elif evt["event"] == "done":
-                    a_msg = evt["message"]
-                    a_dump = a_msg.model_dump()
-                    state.messages.append(a_dump)
-                    yield {
-                        "type": "message",
-                        "session_id": sid,
-                        "message": a_dump,
-                        "round": round_idx + 1,
-                    }
-
-            # ---- Agent B ------------------------------------------------
-            async for evt in self.challenge_agent.generate(state):
-                if evt["event"] == "search_start":
-                    yield {
-                        "type": "phase",
-                        "session_id": sid,
-                        "agent": "B",
-                        "phase": "searching",
-                        "round": round_idx + 1,
-                        "directives": evt.get("directives", []),
-                    }
-                elif evt["event"] == "generate_start":
-                    yield {
-                        "type": "phase",
-                        "session_id": sid,
-                        "agent": "B",
-                        "phase": "generating",
-                        "round": round_idx + 1,
-                    }
-                elif evt["event"] == "token":
-                    yield {
-                        "type": "token",
-                        "session_id": sid,
-                        "agent": "B",
-                        "content": evt["content"],
-                    }
-                elif evt["event"] == "done":
-                    b_msg = evt["message"]
-                    b_dump = b_msg.model_dump()
-                    state.messages.append(b_dump)
-                    yield {
-                        "type": "message",
-                        "session_id": sid,
-                        "message": b_dump,
-                        "round": round_idx + 1,
-                    }
-
-            if b_msg is not None and b_msg.structured.get("stop") is True:
+            async for event in self._relay_turn(self.analysis_agent, state, round_idx + 1):
+                yield event
+            async for event in self._relay_turn(self.challenge_agent, state, round_idx + 1):
+                yield event
+
+            b_last = state.last_by_role.get("B")
+            if b_last is not None and b_last["structured"].get("stop") is True:
                 yield {"type": "stopped", "session_id": sid, "reason": "agent_b_stop"}
                 break
 
@@ -184,7 +114,7 @@ class DialogueEngine:
             elif evt["event"] == "done":
                 c_msg = evt["message"]
                 c_dump = c_msg.model_dump()
-                state.messages.append(c_dump)
+                state.add_message(c_dump)
                 yield {
                     "type": "message",
                     "session_id": sid,
@@ -193,3 +123,39 @@ class DialogueEngine:
                 }
 
         yield {"type": "done", "session_id": sid, "messages": state.messages}
+
+    async def _relay_turn(
+        self,
+        agent: AnalysisAgent | ChallengeAgent,
+        state: DialogueState,
+        round_no: int,
+    ) -> AsyncGenerator[dict, None]:
+        """Translate one A/B turn's agent events into stream events and record its message."""
+        sid = state.session_id
+        agent_id = agent.id
+        async for evt in agent.generate(state):
+            kind = evt["event"]
+            if kind == "token":
+                yield {"type": "token", "session_id": sid, "agent": agent_id, "content": evt["content"]}
+            elif kind == "search_start":
+                yield {
+                    "type": "phase",
+                    "session_id": sid,
+                    "agent": agent_id,
+                    "phase": "searching",
+                    "round": round_no,
+                    "directives": evt.get("directives", []),
+                }
+            elif kind == "generate_start":
+                yield {
+                    "type": "phase",
+                    "session_id": sid,
+                    "agent": agent_id,
+                    "phase": "generating",
+                    "round": round_no,
+                }
+            elif kind == "done":
+                # One dump serves both the session log and the stream payload.
+                dump = evt["message"].model_dump()
+                state.add_message(dump)
+                yield {"type": "message", "session_id": sid, "message": dump, "round": round_no}
@@ -1,14 +1,90 @@
 from __future__ import annotations
 
-import json
-from collections.abc import AsyncGenerator
+import asyncio
+import time
+from collections.abc import AsyncGenerator, AsyncIterator
+from contextlib import asynccontextmanager, nullcontext
 from typing import Any
 
 import httpx
+import orjson
 
+from .http_client import get_http_client
 from .models import LLMConfig
 
 
+class RateLimiter:
+    """Token bucket allowing at most `rate` acquisitions per `period` seconds."""
+
+    def __init__(self, rate: int, period: float = 60.0):
+        self.rate = rate
+        self.period = period
+        self._tokens = float(rate)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate / self.period)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) * self.period / self.rate)
+
+
+_STREAM_TIMEOUT = httpx.Timeout(connect=15, read=120, write=30, pool=5)
+
+# Provider limits apply per endpoint/key/model, so they are shared by every
+# agent and session in the process rather than held per agent instance. The key
+# (including the API key) comes from clients, so idle entries are dropped once the
+# registry is full. An entry with requests in flight is never dropped: a second
+# semaphore for the same key would let the cap be exceeded.
+_LIMITS_MAXSIZE = 256
+
+
+class _SharedLimits:
+    def __init__(self, max_concurrency: int | None, rpm: int | None):
+        self.settings = (max_concurrency, rpm)
+        self.semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+        self.limiter = RateLimiter(rpm) if rpm else None
+        self.active = 0  # requests holding or waiting for a slot
+
+
+_limits: dict[tuple[str, str, str], _SharedLimits] = {}
+
+
+def _shared_limits(config: LLMConfig) -> _SharedLimits:
+    key = (config.base_url, config.api_key, config.model_name)
+    settings = (config.max_concurrency, config.rpm)
+    limits = _limits.get(key)
+    # Changed settings apply to new requests; ones already in flight finish under the old limits.
+    if limits is None or limits.settings != settings:
+        if len(_limits) >= _LIMITS_MAXSIZE:
+            for idle in [k for k, v in _limits.items() if not v.active]:
+                del _limits[idle]
+        limits = _limits[key] = _SharedLimits(*settings)
+    return limits
+
+
+@asynccontextmanager
+async def _llm_slot(config: LLMConfig) -> AsyncIterator[None]:
+    if config.max_concurrency is None and config.rpm is None:
+        yield
+        return
+    limits = _shared_limits(config)
+    limits.active += 1
+    try:
+        async with limits.semaphore or nullcontext():
+            if limits.limiter is not None:
+                await limits.limiter.acquire()
+            yield
+    finally:
+        limits.active -= 1
+
+
 async def call_llm(messages: list[dict[str, str]], config: LLMConfig) -> str:
     """Non-streaming LLM call – used only for short internal tasks (search planning)."""
     payload: dict[str, Any] = {
@@ -22,10 +98,10 @@ async def call_llm(messages: list[dict[str, str]], config: LLMConfig) -> str:
         "Content-Type": "application/json",
     }
     url = f"{config.base_url.rstrip('/')}/chat/completions"
-    async with httpx.AsyncClient(timeout=90) as client:
-        response = await client.post(url, headers=headers, json=payload)
+    async with _llm_slot(config):
+        response = await get_http_client().post(url, headers=headers, json=payload, timeout=90)
         response.raise_for_status()
-        return response.json()["choices"][0]["message"]["content"]
+        return orjson.loads(response.content)["choices"][0]["message"]["content"]
 
 
 async def call_llm_stream(
@@ -50,24 +126,26 @@ async def call_llm_stream(
     url = f"{config.base_url.rstrip('/')}/chat/completions"
 
     try:
-        async with httpx.AsyncClient(timeout=httpx.Timeout(connect=15, read=120, write=30, pool=5)) as client:
-            async with client.stream("POST", url, headers=headers, json=payload) as response:
-                response.raise_for_status()
-                async for raw_line in response.aiter_lines():
-                    line = raw_line.strip()
-                    if not line:
-                        continue
-                    if line == "data: [DONE]":
-                        return
-                    if not line.startswith("data: "):
-                        continue
-                    try:
-                        chunk = json.loads(line[6:])
-                        delta = chunk["choices"][0]["delta"].get("content") or ""
-                        if delta:
-                            yield delta
-                    except (json.JSONDecodeError, KeyError, IndexError):
-                        continue
+        async with _llm_slot(config), get_http_client().stream(
+            "POST", url, headers=headers, json=payload, timeout=_STREAM_TIMEOUT
+        ) as response:
+            response.raise_for_status()
+            async for raw_line in response.aiter_lines():
+                line = raw_line.strip()
+                if not line:
+                    continue
+                if line == "data: [DONE]":
+                    return
+                # Role-only, usage and finish_reason chunks carry no text; skip them unparsed.
+                if not line.startswith("data: ") or '"content"' not in line:
+                    continue
+                try:
+                    chunk = orjson.loads(line[6:])
+                    delta = chunk["choices"][0]["delta"].get("content") or ""
+                    if delta:
+                        yield delta
+                except (orjson.JSONDecodeError, KeyError, IndexError):
+                    continue
     except Exception:
         # Fallback: non-streaming call, yield result as one token
         text = await call_llm(messages=messages, config=config)
@@ -1,28 +1,51 @@
 from __future__ import annotations
 
-import json
+import asyncio
+import hashlib
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from pathlib import Path
 
-from fastapi import FastAPI
+import orjson
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 
 from .agents import AnalysisAgent, ChallengeAgent, ObserverAgent
+from .cache import TTLCache
 from .dialogue_engine import DialogueEngine
+from .http_client import close_http_client
 from .models import RunRequest, RunResponse
 from .prompts import ANALYSIS_LOGIC_PROMPT, CHALLENGE_LOGIC_PROMPT, OBSERVER_LOGIC_PROMPT
 from .search_tool import TavilySearchTool
 
-app = FastAPI(title="Multi-Agent Analysis MVP")
 
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    yield
+    await close_http_client()
+
+
+app = FastAPI(title="Multi-Agent Analysis MVP", lifespan=lifespan, default_response_class=ORJSONResponse)
+# One search tool per Tavily key, so its result cache and in-flight sharing span
+# requests instead of starting empty for every run.
+app.state.search_tools = TTLCache[TavilySearchTool](maxsize=32, ttl=3600)
+
+# The UI is served same-origin and sends no cookies, so a credential-less
+# wildcard lets Starlette emit a constant header instead of echoing each Origin;
+# preflights for the JSON POSTs are cached by browsers for a day.
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST"],
+    allow_headers=["Content-Type"],
+    max_age=86400,
 )
+# Compresses /api/run and static responses; the SSE stream opts out via its
+# explicit Content-Encoding: identity header.
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
 
 # SSE headers that prevent buffering at every layer of the stack
 _SSE_HEADERS = {
@@ -35,9 +58,20 @@ _SSE_HEADERS = {
     "Content-Encoding": "identity",
 }
 
+_SSE_PING_SECONDS = 15
+_SSE_QUEUE_SIZE = 64
+
+
+def get_search_tool(api_key: str) -> TavilySearchTool:
+    search_tool = app.state.search_tools.get(api_key)
+    if search_tool is None:
+        search_tool = TavilySearchTool(api_key=api_key)
+        app.state.search_tools.set(api_key, search_tool)
+    return search_tool
+
 
 def build_engine(req: RunRequest) -> DialogueEngine:
-    search_tool = TavilySearchTool(api_key=req.tavily_api_key)
+    search_tool = get_search_tool(req.tavily_api_key)
     agent_a = AnalysisAgent(
         agent_id="A",
         role="analysis",
@@ -72,7 +106,7 @@ def build_engine(req: RunRequest) -> DialogueEngine:
 
 
 @app.post("/api/run", response_model=RunResponse)
-async def run_dialogue(req: RunRequest) -> RunResponse:
+async def run_dialogue(req: RunRequest) -> ORJSONResponse:
     engine = build_engine(req)
     state = await engine.run(
         topic=req.topic,
@@ -81,7 +115,9 @@ async def run_dialogue(req: RunRequest) -> RunResponse:
         time_context=req.time_context,
         pr_goal=req.pr_goal,
     )
-    return RunResponse(session_id=state.session_id, messages=state.messages)
+    # Messages are already plain model_dump() data; returning the response directly skips
+    # FastAPI re-validating and re-encoding all of them. response_model still documents it.
+    return ORJSONResponse({"session_id": state.session_id, "messages": state.messages})
 
 
 @app.post("/api/run/stream")
@@ -102,9 +138,36 @@ async def run_dialogue_stream(req: RunRequest) -> StreamingResponse:
         padding = ": " + ("stream-start" * 80) + "\n\n"
         yield padding.encode("utf-8")
 
-        async for event in engine.run_stream(state):
-            line = f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
-            yield line.encode("utf-8")
+        # The engine runs in its own task and hands over pre-encoded frames, so it keeps
+        # producing while a slow client drains the socket (up to _SSE_QUEUE_SIZE frames).
+        queue: asyncio.Queue[bytes | None] = asyncio.Queue(maxsize=_SSE_QUEUE_SIZE)
+
+        async def produce() -> None:
+            try:
+                async for event in engine.run_stream(state):
+                    # orjson emits compact UTF-8 bytes directly, so no str round-trip per event.
+                    await queue.put(b"data: " + orjson.dumps(event) + b"\n\n")
+            except Exception:
+                await queue.put(None)
+                raise
+            await queue.put(None)
+
+        producer = asyncio.create_task(produce())
+        try:
+            while True:
+                # Planning and long LLM turns can go quiet for a while; an SSE comment every
+                # _SSE_PING_SECONDS keeps idle-timeout proxies from dropping the connection.
+                try:
+                    frame = await asyncio.wait_for(queue.get(), _SSE_PING_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": ping\n\n"
+                    continue
+                if frame is None:
+                    break
+                yield frame
+            await producer  # surfaces an engine failure instead of ending the stream cleanly
+        finally:
+            producer.cancel()
 
     return StreamingResponse(
         event_gen(),
@@ -117,6 +180,25 @@ static_dir = Path(__file__).resolve().parent.parent / "static"
 app.mount("/static", StaticFiles(directory=static_dir), name="static")
 
 
+# index.html is served from memory with an ETag; only its mtime is checked per
+# request, so edits still show up under --reload without a restart.
+_index_cache: tuple[int, bytes, str] | None = None
+
+
+def _load_index() -> tuple[bytes, str]:
+    global _index_cache
+    path = static_dir / "index.html"
+    mtime = path.stat().st_mtime_ns
+    if _index_cache is None or _index_cache[0] != mtime:
+        body = path.read_bytes()
+        _index_cache = (mtime, body, f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"')
+    return _index_cache[1], _index_cache[2]
+
+
 @app.get("/")
-async def index() -> FileResponse:
-    return FileResponse(static_dir / "index.html")
+async def index(request: Request) -> Response:
+    body, etag = _load_index()
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="text/html", headers=headers)
@@ -1,10 +1,26 @@
 from __future__ import annotations
 
+from collections import deque
 from datetime import datetime, timezone
+from functools import cached_property
+from itertools import islice
 from typing import Any, Literal
 
 from pydantic import BaseModel, Field
 
+# Oldest intel is evicted beyond this many items, bounding memory and per-turn scoring.
+INTEL_POOL_MAXLEN = 200
+# Only the most recent queries are remembered for dedup; older ones may be searched again.
+QUERY_MEMORY = 512
+
+
+def _query_fingerprint(query: str) -> int:
+    return hash(" ".join(query.lower().split()))
+
+
+def _utc_now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
 
 class LLMConfig(BaseModel):
     model_name: str
@@ -12,6 +28,10 @@ class LLMConfig(BaseModel):
     api_key: str
     temperature: float = 0.7
     max_tokens: int = 800
+    max_concurrency: int | None = Field(default=None, ge=1)  # in-flight cap per endpoint/key/model; None = unlimited
+    rpm: int | None = Field(default=None, ge=1)  # requests-per-minute cap; None = unlimited
+    # Optional cheaper/faster model for search planning; the main model is the fallback.
+    planner_config: LLMConfig | None = None
 
 
 class AgentConfig(LLMConfig):
@@ -25,6 +45,20 @@ class RetrievalResult(BaseModel):
     content: str
     score: float = 0.0
 
+    # Prompt previews are re-rendered every turn; slice the content only once.
+    @cached_property
+    def snippet_short(self) -> str:
+        return self.content[:160]
+
+    @cached_property
+    def snippet_med(self) -> str:
+        return self.content[:200]
+
+    # Lower-cased title + content, matched against focus keywords on every turn.
+    @cached_property
+    def match_text(self) -> str:
+        return f"{self.title} {self.content}".lower()
+
 
 class SearchDirective(BaseModel):
     query: str
@@ -40,14 +74,14 @@ class AgentMessage(BaseModel):
     citation_sources: list[RetrievalResult] = Field(default_factory=list)
     search_queries: list[str] = Field(default_factory=list)
     search_directives: list[SearchDirective] = Field(default_factory=list)
-    timestamp: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+    timestamp: str = Field(default_factory=_utc_now_iso)
 
 
 class UserMessage(BaseModel):
     role: Literal["user"] = "user"
     content: str
     structured: dict[str, Any] = Field(default_factory=dict)
-    timestamp: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+    timestamp: str = Field(default_factory=_utc_now_iso)
 
 
 class DialogueState(BaseModel):
@@ -58,32 +92,55 @@ class DialogueState(BaseModel):
     turn_index: int = 0
     max_rounds: int = 4
     messages: list[dict[str, Any]] = Field(default_factory=list)
-    intel_pool: list[RetrievalResult] = Field(default_factory=list)
+    last_by_role: dict[str, dict[str, Any]] = Field(default_factory=dict)
+    intel_pool: deque[RetrievalResult] = Field(default_factory=lambda: deque(maxlen=INTEL_POOL_MAXLEN))
     intel_ids: set[str] = Field(default_factory=set)
-    searched_queries: list[str] = Field(default_factory=list)
-    searched_query_fingerprints: set[str] = Field(default_factory=set)
+    searched_queries: deque[str] = Field(default_factory=lambda: deque(maxlen=QUERY_MEMORY))
+    searched_query_fingerprints: set[int] = Field(default_factory=set)
+
+    # Topic/time/goal never change within a session; every agent prompt opens with them.
+    @cached_property
+    def prompt_header(self) -> str:
+        return (
+            f"话题: {self.topic}\n"
+            f"时间背景: {self.time_context or '未提供'}\n"
+            f"PR目标: {self.pr_goal or '未提供'}\n"
+        )
+
+    def add_message(self, message: dict[str, Any]) -> None:
+        self.messages.append(message)
+        self.last_by_role[message.get("role", "")] = message
 
     def add_intel(self, retrievals: list[RetrievalResult]) -> list[RetrievalResult]:
         newly_added: list[RetrievalResult] = []
+        ids, pool = self.intel_ids, self.intel_pool
         for item in retrievals:
-            if item.id in self.intel_ids:
+            if item.id in ids:
                 continue
-            self.intel_ids.add(item.id)
-            self.intel_pool.append(item)
+            if len(pool) == pool.maxlen:
+                ids.discard(pool[0].id)
+            ids.add(item.id)
+            pool.append(item)
             newly_added.append(item)
         return newly_added
 
+    def recent_intel(self, n: int) -> list[RetrievalResult]:
+        return list(islice(self.intel_pool, max(len(self.intel_pool) - n, 0), None))
+
     def add_queries(self, queries: list[str]) -> list[str]:
         new_queries: list[str] = []
+        fingerprints, searched = self.searched_query_fingerprints, self.searched_queries
         for query in queries:
             q = query.strip()
             if not q:
                 continue
-            fingerprint = " ".join(q.lower().split())
-            if fingerprint in self.searched_query_fingerprints:
+            fingerprint = _query_fingerprint(q)
+            if fingerprint in fingerprints:
                 continue
-            self.searched_query_fingerprints.add(fingerprint)
-            self.searched_queries.append(q)
+            if len(searched) == searched.maxlen:
+                fingerprints.discard(_query_fingerprint(searched[0]))
+            fingerprints.add(fingerprint)
+            searched.append(q)
             new_queries.append(q)
         return new_queries
 
@@ -1,16 +1,25 @@
 from __future__ import annotations
 
+import asyncio
 import hashlib
+import itertools
 from typing import Any
 
-import httpx
+from .cache import TTLCache
+from .http_client import get_http_client
+from .models import RetrievalResult, SearchDirective
 
-from .models import RetrievalResult
+SearchKey = tuple[str, int, tuple[str, ...], int | None]
 
 
 class TavilySearchTool:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, max_concurrency: int = 8):
         self.api_key = api_key
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        # Planned queries overlap heavily across turns; identical requests are
+        # served from cache, and concurrent identical requests share one call.
+        self._cache: TTLCache[list[RetrievalResult]] = TTLCache(maxsize=512, ttl=600)
+        self._inflight: dict[SearchKey, asyncio.Future[list[RetrievalResult]]] = {}
 
     async def search(
         self,
@@ -18,6 +27,50 @@ class TavilySearchTool:
         topk: int,
         include_domains: list[str] | None = None,
         days: int | None = None,
+    ) -> list[RetrievalResult]:
+        domains = [d.strip() for d in (include_domains or []) if d.strip()]
+        if not (days and 1 <= days <= 365):
+            days = None
+        key: SearchKey = (" ".join(query.lower().split()), topk, tuple(sorted(domains)), days)
+
+        cached = self._cache.get(key)
+        if cached is not None:
+            return list(cached)
+
+        pending = self._inflight.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._fetch(key, query, topk, domains, days))
+            self._inflight[key] = pending
+            pending.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shield so a cancelled caller does not cancel the request other callers share.
+        return list(await asyncio.shield(pending))
+
+    async def search_many(
+        self,
+        directives: list[SearchDirective],
+        topk: int,
+        default_domains: list[str] | None = None,
+    ) -> list[RetrievalResult]:
+        """Run all directives concurrently and merge their results in directive order.
+
+        Concurrency is bounded by the tool's semaphore; a failed search contributes nothing.
+        """
+        gathered = await asyncio.gather(
+            *(
+                self.search(d.query, topk, include_domains=d.domains or default_domains, days=d.days)
+                for d in directives
+            ),
+            return_exceptions=True,
+        )
+        return list(itertools.chain.from_iterable(group for group in gathered if isinstance(group, list)))
+
+    async def _fetch(
+        self,
+        key: SearchKey,
+        query: str,
+        topk: int,
+        domains: list[str],
+        days: int | None,
     ) -> list[RetrievalResult]:
         url = "https://api.tavily.com/search"
         payload: dict[str, Any] = {
@@ -26,14 +79,13 @@ class TavilySearchTool:
             "max_results": topk,
             "include_answer": False,
         }
-        domains = [d.strip() for d in (include_domains or []) if d.strip()]
         if domains:
             payload["include_domains"] = domains
-        if days and 1 <= days <= 365:
+        if days:
             payload["days"] = days
         try:
-            async with httpx.AsyncClient(timeout=30) as client:
-                response = await client.post(url, json=payload)
+            async with self._semaphore:
+                response = await get_http_client().post(url, json=payload, timeout=30)
                 response.raise_for_status()
                 data = response.json()
         except Exception:
@@ -41,15 +93,19 @@ class TavilySearchTool:
 
         results: list[RetrievalResult] = []
         for idx, item in enumerate(data.get("results", [])):
-            url_value = item.get("url", "")
-            rid = hashlib.md5(f"{url_value}-{idx}".encode()).hexdigest()[:12]
+            url_value = str(item.get("url") or "")
+            rid = hashlib.blake2b(f"{url_value}-{idx}".encode(), digest_size=6).hexdigest()
+            # Fields are coerced here, so validation is skipped for this trusted shape.
             results.append(
-                RetrievalResult(
+                RetrievalResult.model_construct(
                     id=rid,
-                    title=item.get("title", ""),
+                    title=str(item.get("title") or ""),
                     url=url_value,
-                    content=item.get("content", ""),
+                    content=str(item.get("content") or ""),
                     score=float(item.get("score", 0.0) or 0.0),
                 )
             )
+        # Failures and empty answers are not cached so the next turn can retry.
+        if results:
+            self._cache.set(key, results)
         return results
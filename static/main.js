@@ -120,6 +120,25 @@ tabs.forEach(tab => {
 // ─────────────────────────────────────────────────────────────
 //  Config extraction
 // ─────────────────────────────────────────────────────────────
+// Blank number inputs mean "no limit" and are sent as null.
+function optionalInt(id) {
+  const v = document.getElementById(id).value.trim();
+  return v ? Number(v) : null;
+}
+
+// A and B may plan searches on a separate model; endpoint and key default to the agent's own.
+function plannerCfg(agent) {
+  const model = document.getElementById('p_model').value.trim();
+  if (!model) return null;
+  return {
+    model_name:  model,
+    base_url:    document.getElementById('p_base').value.trim() || agent.base_url,
+    api_key:     document.getElementById('p_key').value || agent.api_key,
+    temperature: Number(document.getElementById('p_temp').value),
+    max_tokens:  Number(document.getElementById('p_max').value),
+  };
+}
+
 function cfg(prefix) {
   return {
     model_name:        document.getElementById(`${prefix}_model`).value,
@@ -127,10 +146,16 @@ function cfg(prefix) {
     api_key:           document.getElementById(`${prefix}_key`).value,
     temperature:       Number(document.getElementById(`${prefix}_temp`).value),
     max_tokens:        Number(document.getElementById(`${prefix}_max`).value),
+    max_concurrency:   optionalInt(`${prefix}_conc`),
+    rpm:               optionalInt(`${prefix}_rpm`),
     capability_prompt: document.getElementById(`${prefix}_capability`).value,
   };
 }
 
+function withPlanner(agent) {
+  return { ...agent, planner_config: plannerCfg(agent) };
+}
+
 // ─────────────────────────────────────────────────────────────
 //  HTML / Markdown helpers
 // ─────────────────────────────────────────────────────────────
@@ -832,8 +857,8 @@ startBtn.addEventListener('click', async () => {
     time_context: timeContext,
     pr_goal:      prGoal,
     max_rounds:   maxRounds,
-    agentA_config: cfg('a'),
-    agentB_config: cfg('b'),
+    agentA_config: withPlanner(cfg('a')),
+    agentB_config: withPlanner(cfg('b')),
     agentC_config: cfg('c'),
     tavily_api_key: document.getElementById('tavilyKey').value,
     search_topk:   Number(document.getElementById('searchTopk').value),